@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from typing import Any, Callable, List, Optional
+
+from domain import ProcessGraph
+from schemas import FromStepsRequest, decode_request
+
+
+STEP_TYPES_CYCLE = ("task", "task", "cond_yes_no", "task", "cond_and", "task", "cond_or")
+
+
+def make_payload(steps_count: int) -> bytes:
+    """
+    Формирует тело запроса /api/process/from-steps, как его отправляет web_index.html.
+    """
+    steps = [
+        {
+            "title": f"Шаг процесса {index + 1}",
+            "department": f"Отдел_{index % 7 + 1}",
+            "type": STEP_TYPES_CYCLE[index % len(STEP_TYPES_CYCLE)],
+        }
+        for index in range(steps_count)
+    ]
+    return json.dumps({"steps": steps}, ensure_ascii=False).encode("utf-8")
+
+
+def legacy_decode(data: bytes) -> Any:
+    """
+    Прежнее декодирование: json.loads в словари.
+    """
+    return json.loads(data) or {}
+
+
+def schema_decode(data: bytes) -> Any:
+    """
+    Новое декодирование: скомпилированный декодер msgspec в структуры.
+    """
+    return decode_request(data, FromStepsRequest)
+
+
+def legacy_path(data: bytes) -> ProcessGraph:
+    """
+    Прежний путь: json.loads, чтение ключей словаря и очистка полей в домене.
+    """
+    payload = json.loads(data) or {}
+    return ProcessGraph.from_structured_steps(payload.get("steps") or [])
+
+
+def schema_path(data: bytes) -> ProcessGraph:
+    """
+    Новый путь: скомпилированный декодер msgspec и построение по структурам.
+    """
+    payload = decode_request(data, FromStepsRequest)
+    return ProcessGraph.from_structured_steps(payload.steps)
+
+
+def measure(func: Callable[[bytes], Any], data: bytes, repeat: int) -> float:
+    """
+    Возвращает лучшее время одного вызова в секундах.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Сравнивает пропускную способность декодирования и построения графа.
+    """
+    parser = argparse.ArgumentParser(description="Бенчмарк декодирования шагов и построения графа.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'steps':>8} {'decode json':>12} {'decode msgspec':>15} {'speedup':>8} "
+        f"{'total json':>11} {'total msgspec':>14} {'speedup':>8}  (ms)"
+    )
+    for size in args.sizes:
+        data = make_payload(size)
+        legacy_decode_time = measure(legacy_decode, data, args.repeat)
+        schema_decode_time = measure(schema_decode, data, args.repeat)
+        legacy = measure(legacy_path, data, args.repeat)
+        schema = measure(schema_path, data, args.repeat)
+        print(
+            f"{size:>8} {legacy_decode_time * 1000:>12.3f} {schema_decode_time * 1000:>15.3f} "
+            f"{legacy_decode_time / schema_decode_time:>7.2f}x "
+            f"{legacy * 1000:>11.3f} {schema * 1000:>14.3f} {legacy / schema:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -14,4 +14,37 @@ class AppConfig:
     # Путь к файлу с сохранённым процессом
     PROCESS_FILE: Path = BASE_DIR / "process.json"
 
+    # Каталог с остальными сохранёнными процессами (по файлу на процесс)
+    PROCESSES_DIR: Path = BASE_DIR / "processes"
+
+    # Каталог аналитической выгрузки архива процессов (Arrow/Parquet)
+    EXPORT_DIR: Path = BASE_DIR / "export"
+
+    # Количество файлов-сегментов, по которым распределяются процессы в выгрузке
+    EXPORT_SEGMENTS: int = 16
+
+    # Количество строк в одной пачке записи (record batch) выгрузки
+    EXPORT_BATCH_ROWS: int = 10000
+
+    # Максимальный размер JSON-тела запроса к API (байт)
+    MAX_PAYLOAD_BYTES: int = 8 * 1024 * 1024
+
+    # Максимальное количество шагов в одном запросе
+    MAX_STEPS: int = 20000
+
+    # Максимальная длина названия шага
+    MAX_STEP_TITLE_LENGTH: int = 1000
+
+    # Количество процессов, для которых в памяти кэшируется текущая версия
+    VERSION_CACHE_SIZE: int = 1024
+
+    # Количество шагов, записываемых в хранилище за одну пачку при импорте
+    IMPORT_BATCH_SIZE: int = 500
+
+    # Кодировка CSV-реестров по умолчанию (Excel в русской локали пишет cp1251)
+    IMPORT_ENCODING: str = "utf-8-sig"
+
+    # Максимальное количество сохраняемых в отчёте ошибок импорта
+    IMPORT_MAX_ERRORS: int = 1000
+
 
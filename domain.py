@@ -1,7 +1,12 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional
+from typing import Any, Dict, Iterable, List, Literal, Optional, Sequence, get_args
+
+
+# Типы шагов, которые умеет строить from_structured_steps
+StepType = Literal["task", "cond_yes_no", "cond_and", "cond_or"]
+STEP_TYPES = get_args(StepType)
 
 
 @dataclass
@@ -81,7 +86,7 @@ class ProcessGraph:
         }
 
     @classmethod
-    def from_text_lines(cls, lines: List[str]) -> "ProcessGraph":
+    def from_text_lines(cls, lines: Iterable[str]) -> "ProcessGraph":
         """
         Создает простой линейный процесс из списка строк.
 
@@ -109,12 +114,15 @@ class ProcessGraph:
         return graph
 
     @classmethod
-    def from_structured_steps(cls, steps: List[Dict[str, str]]) -> "ProcessGraph":
+    def from_structured_steps(cls, steps: Sequence[Any]) -> "ProcessGraph":
         """
         Создает процесс из структурированного списка шагов.
 
         Каждый шаг задается словарем вида:
         {"title": "Описание", "department": "Отдел_1", "type": "task"}
+        либо уже декодированной структурой schemas.StepPayload,
+        тип которой проверен декодером, а поля очищены от крайних пробелов.
+        Шаги без названия пропускаются.
         """
         graph = cls()
 
@@ -122,9 +130,14 @@ class ProcessGraph:
         ordered_nodes: List[ProcessNode] = []
 
         for index, step in enumerate(steps):
-            title = (step.get("title") or "").strip()
-            department = (step.get("department") or "").strip() or None
-            node_type = (step.get("type") or "task").strip() or "task"
+            if isinstance(step, dict):
+                title = (step.get("title") or "").strip()
+                department = (step.get("department") or "").strip() or None
+                node_type = (step.get("type") or "task").strip() or "task"
+            else:
+                title = step.title
+                department = step.department or None
+                node_type = step.type
 
             if not title:
                 continue
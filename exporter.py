@@ -0,0 +1,465 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from config import AppConfig
+from domain import ProcessGraph
+from persistence import ProcessRepository
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.fs as pafs
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow нужен только для выгрузки
+    pa = None
+
+
+EXPORT_FORMATS = ("parquet", "arrow")
+
+# Имя файла со сведениями о выгруженных версиях процессов
+MANIFEST_NAME = "manifest.json"
+
+TABLES = ("nodes", "edges")
+
+
+class ExportError(RuntimeError):
+    """
+    Выгрузку архива выполнить невозможно.
+    """
+
+
+def _schemas() -> Dict[str, "pa.Schema"]:
+    """
+    Схемы таблиц выгрузки.
+    """
+    return {
+        "nodes": pa.schema(
+            [
+                ("process_id", pa.string()),
+                ("version", pa.int64()),
+                ("step_id", pa.string()),
+                ("position", pa.int32()),
+                ("title", pa.string()),
+                ("lane", pa.string()),
+                ("node_type", pa.string()),
+            ]
+        ),
+        "edges": pa.schema(
+            [
+                ("process_id", pa.string()),
+                ("version", pa.int64()),
+                ("from_id", pa.string()),
+                ("to_id", pa.string()),
+                ("branch_type", pa.string()),
+                ("label", pa.string()),
+            ]
+        ),
+    }
+
+
+@dataclass
+class ExportReport:
+    """
+    Итог выгрузки архива процессов.
+    """
+
+    exported: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    removed: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Преобразует отчёт в словарь для сериализации.
+        """
+        return {
+            "exported": self.exported,
+            "unchanged": self.unchanged,
+            "removed": self.removed,
+        }
+
+
+class _SegmentWriter:
+    """
+    Запись одной таблицы сегмента во временный файл пачками по batch_rows.
+    """
+
+    def __init__(self, path: Path, schema: "pa.Schema", file_format: str, batch_rows: int) -> None:
+        self._path = path
+        self._schema = schema
+        self._batch_rows = batch_rows
+        self._buffer: List["pa.RecordBatch"] = []
+        self._buffered_rows = 0
+        self._total_rows = 0
+
+        fd, self._tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+        os.close(fd)
+        if file_format == "parquet":
+            self._writer = pq.ParquetWriter(self._tmp_name, schema)
+        else:
+            self._writer = ipc.new_file(self._tmp_name, schema)
+
+    def add(self, batch: "pa.RecordBatch") -> None:
+        """
+        Добавляет строки, записывая накопленное при достижении batch_rows.
+        """
+        if not batch.num_rows:
+            return
+        self._buffer.append(batch)
+        self._buffered_rows += batch.num_rows
+        if self._buffered_rows >= self._batch_rows:
+            self._flush()
+
+    def commit(self) -> None:
+        """
+        Дописывает остаток и атомарно заменяет файл сегмента.
+
+        Пустой сегмент не хранится: прежний файл удаляется.
+        """
+        self._flush()
+        self._writer.close()
+        if self._total_rows:
+            os.replace(self._tmp_name, self._path)
+        else:
+            os.unlink(self._tmp_name)
+            self._path.unlink(missing_ok=True)
+
+    def abort(self) -> None:
+        """
+        Отменяет запись и удаляет временный файл.
+        """
+        self._writer.close()
+        if os.path.exists(self._tmp_name):
+            os.unlink(self._tmp_name)
+
+    def _flush(self) -> None:
+        if not self._buffer:
+            return
+        table = pa.Table.from_batches(self._buffer, schema=self._schema).combine_chunks()
+        for batch in table.to_batches(max_chunksize=self._batch_rows):
+            self._writer.write_batch(batch)
+        self._total_rows += self._buffered_rows
+        self._buffer = []
+        self._buffered_rows = 0
+
+
+class ArchiveExporter:
+    """
+    Колоночная выгрузка всех сохранённых процессов в Arrow/Parquet.
+
+    Процессы распределяются по EXPORT_SEGMENTS сегментам по хэшу
+    идентификатора; каждая таблица (nodes, edges) хранится как набор файлов
+    сегментов. Повторная выгрузка переписывает только сегменты, где есть
+    изменённые или удалённые процессы: строки остальных процессов копируются
+    из прежнего файла сегмента, а не читаются из хранилища. Строки пишутся
+    пачками (record batch) по EXPORT_BATCH_ROWS, поэтому в памяти находится
+    не больше одной пачки и одного процесса. Аналитика читает только
+    каталог выгрузки (см. open_dataset).
+    """
+
+    def __init__(
+        self,
+        repository: ProcessRepository,
+        output_dir: Path = AppConfig.EXPORT_DIR,
+        file_format: str = "parquet",
+        batch_rows: int = AppConfig.EXPORT_BATCH_ROWS,
+        segments: int = AppConfig.EXPORT_SEGMENTS,
+    ) -> None:
+        """
+        Инициализирует выгрузку в каталог output_dir в формате file_format.
+        """
+        if pa is None:
+            raise ExportError("Для выгрузки архива установите пакет pyarrow.")
+        if file_format not in EXPORT_FORMATS:
+            raise ExportError(f"Неподдерживаемый формат '{file_format}', ожидается parquet или arrow.")
+
+        self._repository = repository
+        self._output_dir = output_dir
+        self._format = file_format
+        self._batch_rows = max(1, batch_rows)
+        self._segments = max(1, segments)
+        self._schemas = _schemas()
+
+    def export(self, full: bool = False) -> ExportReport:
+        """
+        Выгружает изменившиеся процессы и удаляет выгрузку удалённых.
+
+        При full=True все процессы выгружаются заново.
+        """
+        for table in TABLES:
+            (self._output_dir / table).mkdir(parents=True, exist_ok=True)
+
+        manifest = self._read_manifest()
+        old_format = manifest.get("format", self._format)
+        old_processes: Dict[str, Dict[str, int]] = manifest.get("processes", {})
+        if old_format != self._format or manifest.get("segments", self._segments) != self._segments:
+            # Прежние файлы несовместимы: удаляются, всё выгружается заново
+            self._remove_segment_files(old_format)
+            full = True
+        previous = {} if full else old_processes
+
+        current: Dict[str, Dict[str, int]] = {}
+        fresh: Dict[int, List[str]] = {}
+        report = ExportReport()
+
+        for process_id in self._repository.list_processes():
+            # Отметка снимается до чтения: изменение во время выгрузки
+            # приведёт к повторной выгрузке процесса в следующий раз
+            try:
+                marker = self._marker(process_id)
+            except FileNotFoundError:
+                # Процесс удалён после получения списка — считается удалённым
+                continue
+            known = previous.get(process_id)
+            if known is not None and all(known.get(key) == value for key, value in marker.items()):
+                current[process_id] = known
+                report.unchanged += 1
+            else:
+                current[process_id] = marker
+                fresh.setdefault(self._segment_of(process_id), []).append(process_id)
+
+        dirty = set(fresh)
+        dirty.update(self._segment_of(process_id) for process_id in set(old_processes) - set(current))
+
+        for segment in sorted(dirty):
+            fresh_ids = fresh.get(segment, [])
+            keep = {
+                process_id
+                for process_id in current
+                if self._segment_of(process_id) == segment and process_id not in fresh_ids
+            }
+            report.exported.extend(self._rewrite_segment(segment, keep, fresh_ids, current, full))
+
+        report.removed = sorted(set(old_processes) - set(current))
+        manifest = {"format": self._format, "segments": self._segments, "processes": current}
+        self._write_json(self._output_dir / MANIFEST_NAME, manifest)
+        return report
+
+    def _rewrite_segment(
+        self,
+        segment: int,
+        keep: Set[str],
+        fresh_ids: List[str],
+        current: Dict[str, Dict[str, int]],
+        full: bool,
+    ) -> List[str]:
+        """
+        Пересобирает файлы сегмента и возвращает выгруженные из хранилища процессы.
+
+        Процессы, исчезнувшие из хранилища во время выгрузки, удаляются из current.
+        """
+        writers = {
+            table: _SegmentWriter(self._segment_path(table, segment), schema, self._format, self._batch_rows)
+            for table, schema in self._schemas.items()
+        }
+        exported: List[str] = []
+        try:
+            if keep and not full:
+                for table, writer in writers.items():
+                    for batch in self._read_kept(table, segment, keep):
+                        writer.add(batch)
+
+            for process_id in fresh_ids:
+                try:
+                    data = self._repository.load(process_id)
+                except FileNotFoundError:
+                    del current[process_id]
+                    continue
+                current[process_id]["version"] = data["version"]
+                nodes, edges = self._process_batches(process_id, data)
+                writers["nodes"].add(nodes)
+                writers["edges"].add(edges)
+                exported.append(process_id)
+
+            for writer in writers.values():
+                writer.commit()
+        except BaseException:
+            for writer in writers.values():
+                writer.abort()
+            raise
+        return exported
+
+    def _read_kept(self, table: str, segment: int, keep: Set[str]) -> Iterator["pa.RecordBatch"]:
+        """
+        Потоково читает из прежнего файла сегмента строки неизменённых процессов.
+        """
+        path = self._segment_path(table, segment)
+        if not path.exists():
+            return iter(())
+        dataset = ds.dataset(str(path), format=self._format, schema=self._schemas[table])
+        return dataset.to_batches(filter=ds.field("process_id").isin(sorted(keep)))
+
+    def _process_batches(self, process_id: str, data: Dict[str, Any]) -> Tuple["pa.RecordBatch", "pa.RecordBatch"]:
+        """
+        Строит граф процесса и возвращает его узлы и связи в виде record batch.
+        """
+        version = data["version"]
+        graph = ProcessGraph.from_structured_steps(data["steps"])
+        nodes = list(graph.nodes.values())
+        edges = graph.edges
+
+        node_batch = pa.RecordBatch.from_pydict(
+            {
+                "process_id": [process_id] * len(nodes),
+                "version": [version] * len(nodes),
+                "step_id": [node.id for node in nodes],
+                "position": list(range(len(nodes))),
+                "title": [node.title for node in nodes],
+                "lane": [node.lane for node in nodes],
+                "node_type": [node.node_type for node in nodes],
+            },
+            schema=self._schemas["nodes"],
+        )
+        edge_batch = pa.RecordBatch.from_pydict(
+            {
+                "process_id": [process_id] * len(edges),
+                "version": [version] * len(edges),
+                "from_id": [edge.from_id for edge in edges],
+                "to_id": [edge.to_id for edge in edges],
+                "branch_type": [edge.branch_type for edge in edges],
+                "label": [edge.label for edge in edges],
+            },
+            schema=self._schemas["edges"],
+        )
+        return node_batch, edge_batch
+
+    def _marker(self, process_id: str) -> Dict[str, int]:
+        """
+        Возвращает признак состояния файла процесса.
+
+        Каждое сохранение заменяет файл новым (новый inode), поэтому
+        перестановка шагов с тем же размером в тот же такт mtime
+        всё равно распознаётся как изменение.
+        """
+        stat = self._repository.path_for(process_id).stat()
+        return {"ino": stat.st_ino, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+    def _segment_of(self, process_id: str) -> int:
+        """
+        Возвращает номер сегмента процесса (стабильный между запусками).
+        """
+        return zlib.crc32(process_id.encode("utf-8")) % self._segments
+
+    def _segment_path(self, table: str, segment: int) -> Path:
+        """
+        Возвращает путь к файлу таблицы сегмента.
+        """
+        return self._output_dir / table / f"segment-{segment:04d}.{self._format}"
+
+    def _remove_segment_files(self, file_format: str) -> None:
+        """
+        Удаляет все файлы сегментов в указанном формате.
+        """
+        for table in TABLES:
+            for path in (self._output_dir / table).glob(f"*.{file_format}"):
+                path.unlink()
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        """
+        Читает сведения о прошлой выгрузке, если они есть.
+        """
+        path = self._output_dir / MANIFEST_NAME
+        if not path.exists():
+            return {}
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    @staticmethod
+    def _write_json(path: Path, data: Dict[str, Any]) -> None:
+        """
+        Атомарно записывает JSON-файл.
+        """
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+def open_dataset(table: str, output_dir: Path = AppConfig.EXPORT_DIR, memory_map: bool = True) -> "ds.Dataset":
+    """
+    Открывает таблицу выгрузки (nodes или edges) как pyarrow.dataset.
+
+    Сканирование идёт пачками по файлам сегментов, фильтры и выбор колонок
+    передаются в чтение (для Parquet — с отсечением row group по статистике).
+    При memory_map=True файлы отображаются в память, для Arrow — без копирования.
+    """
+    if pa is None:
+        raise ExportError("Для чтения выгрузки установите пакет pyarrow.")
+    if table not in TABLES:
+        raise ExportError(f"Неизвестная таблица '{table}', ожидается nodes или edges.")
+
+    manifest_path = output_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        raise ExportError(f"В каталоге {output_dir} нет выгрузки.")
+    file_format = json.loads(manifest_path.read_text(encoding="utf-8"))["format"]
+
+    # Временные файлы выгрузки начинаются с точки и не попадают в набор
+    return ds.dataset(
+        str(output_dir / table),
+        format=file_format,
+        schema=_schemas()[table],
+        filesystem=pafs.LocalFileSystem(use_mmap=memory_map),
+    )
+
+
+def open_table(
+    table: str,
+    output_dir: Path = AppConfig.EXPORT_DIR,
+    memory_map: bool = True,
+    columns: Optional[List[str]] = None,
+    filter: Optional["ds.Expression"] = None,
+) -> "pa.Table":
+    """
+    Читает таблицу выгрузки целиком в память.
+
+    Результат (с учётом columns и filter) материализуется полностью;
+    для больших архивов сканируйте open_dataset(...).to_batches().
+    """
+    return open_dataset(table, output_dir, memory_map).to_table(columns=columns, filter=filter)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Точка входа CLI: выгружает архив процессов для аналитики.
+    """
+    parser = argparse.ArgumentParser(description="Выгрузка архива процессов в Arrow/Parquet.")
+    parser.add_argument("--output", type=Path, default=AppConfig.EXPORT_DIR, help="Каталог выгрузки")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="parquet", help="Формат файлов")
+    parser.add_argument("--full", action="store_true", help="Выгрузить все процессы заново")
+    parser.add_argument(
+        "--segments",
+        type=int,
+        default=AppConfig.EXPORT_SEGMENTS,
+        help="Количество файлов-сегментов, по которым распределяются процессы",
+    )
+    parser.add_argument(
+        "--batch-rows",
+        type=int,
+        default=AppConfig.EXPORT_BATCH_ROWS,
+        help="Количество строк в одной пачке записи",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        exporter = ArchiveExporter(
+            ProcessRepository(),
+            output_dir=args.output,
+            file_format=args.format,
+            batch_rows=args.batch_rows,
+            segments=args.segments,
+        )
+        report = exporter.export(full=args.full)
+    except ExportError as error:
+        parser.error(str(error))
+
+    print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
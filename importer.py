@@ -0,0 +1,381 @@
+from __future__ import annotations
+
+import argparse
+import codecs
+import csv
+import itertools
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+from config import AppConfig
+from domain import STEP_TYPES
+from persistence import DEFAULT_PROCESS_ID, ProcessRepository
+
+try:
+    from openpyxl import load_workbook
+except ImportError:  # pragma: no cover - openpyxl нужен только для XLSX
+    load_workbook = None
+
+
+# Допустимые заголовки колонок реестра (в нижнем регистре)
+COLUMN_ALIASES: Dict[str, str] = {
+    "title": "title",
+    "название": "title",
+    "шаг": "title",
+    "department": "department",
+    "отдел": "department",
+    "исполнитель": "department",
+    "type": "type",
+    "тип": "type",
+}
+
+# Подписи типов шагов из веб-интерфейса
+TYPE_ALIASES: Dict[str, str] = {
+    "задача": "task",
+    "условие (да/нет)": "cond_yes_no",
+    "условие (и)": "cond_and",
+    "условие (или)": "cond_or",
+}
+
+SUPPORTED_FORMATS = ("csv", "xlsx")
+
+
+class ImportFormatError(ValueError):
+    """
+    Файл реестра не может быть прочитан (формат, заголовок, зависимости).
+    """
+
+
+@dataclass
+class RowError:
+    """
+    Ошибка валидации строки реестра.
+    """
+
+    row: int
+    message: str
+
+
+@dataclass
+class ImportReport:
+    """
+    Итог импорта реестра шагов.
+    """
+
+    imported: int = 0
+    committed: bool = False
+    skipped: int = 0
+    version: int = 0
+    departments: List[str] = field(default_factory=list)
+    errors: List[RowError] = field(default_factory=list)
+    error_count: int = 0
+
+    def add_error(self, row: int, message: str, max_errors: int) -> None:
+        """
+        Учитывает ошибку строки, храня не более max_errors подробностей.
+        """
+        self.error_count += 1
+        if len(self.errors) < max_errors:
+            self.errors.append(RowError(row=row, message=message))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Преобразует отчёт в словарь для сериализации.
+        """
+        return {
+            "imported": self.imported,
+            "committed": self.committed,
+            "skipped": self.skipped,
+            "version": self.version,
+            "departments": self.departments,
+            "error_count": self.error_count,
+            "errors": [{"row": error.row, "message": error.message} for error in self.errors],
+        }
+
+
+class StepRowParser:
+    """
+    Преобразует строки реестра в шаги для ProcessGraph.from_structured_steps.
+    """
+
+    def __init__(self, header: Sequence[Any]) -> None:
+        """
+        Сопоставляет колонки заголовка с полями шага.
+        """
+        self._columns: Dict[str, int] = {}
+        for index, name in enumerate(header):
+            key = COLUMN_ALIASES.get(str(name or "").strip().lower())
+            if key and key not in self._columns:
+                self._columns[key] = index
+
+        if "title" not in self._columns:
+            raise ImportFormatError("В заголовке реестра нет колонки title (название шага).")
+
+    @staticmethod
+    def is_blank(row: Sequence[Any]) -> bool:
+        """
+        Проверяет, что строка не содержит значений.
+        """
+        return all(value is None or not str(value).strip() for value in row)
+
+    def parse(self, row: Sequence[Any]) -> Dict[str, str]:
+        """
+        Валидирует строку и возвращает шаг вида
+        {"title": ..., "department": ..., "type": ...}.
+        """
+        title = self._cell(row, "title")
+        if not title:
+            raise ValueError("не заполнено название шага")
+
+        raw_type = self._cell(row, "type")
+        step_type = TYPE_ALIASES.get(raw_type.lower(), raw_type) or "task"
+        if step_type not in STEP_TYPES:
+            raise ValueError(f"неизвестный тип шага '{raw_type}'")
+
+        return {
+            "title": title,
+            "department": self._cell(row, "department"),
+            "type": step_type,
+        }
+
+    def _cell(self, row: Sequence[Any], key: str) -> str:
+        """
+        Возвращает очищенное значение колонки или пустую строку.
+        """
+        index = self._columns.get(key)
+        if index is None or index >= len(row) or row[index] is None:
+            return ""
+        return str(row[index]).strip()
+
+
+class StepImporter:
+    """
+    Потоковый импорт шагов процесса из реестров CSV/XLSX в хранилище.
+
+    Строки читаются по одной и записываются в репозиторий пачками,
+    поэтому память не зависит от размера реестра.
+    """
+
+    def __init__(
+        self,
+        repository: ProcessRepository,
+        batch_size: int = AppConfig.IMPORT_BATCH_SIZE,
+        max_errors: int = AppConfig.IMPORT_MAX_ERRORS,
+        allow_partial: bool = False,
+    ) -> None:
+        """
+        Инициализирует импорт с указанным репозиторием и размером пачки.
+        """
+        self._repository = repository
+        self._batch_size = max(1, batch_size)
+        self._max_errors = max_errors
+        self._allow_partial = allow_partial
+
+    def import_file(
+        self,
+        path: Path,
+        process_id: str = DEFAULT_PROCESS_ID,
+        encoding: str = AppConfig.IMPORT_ENCODING,
+    ) -> ImportReport:
+        """
+        Импортирует реестр из файла, определяя формат по расширению.
+
+        encoding используется только для CSV.
+        """
+        file_format = detect_format(path.name)
+        if file_format == "csv":
+            with path.open("rb") as binary:
+                return self.import_csv(decode_lines(binary, encoding), process_id)
+        with path.open("rb") as binary:
+            return self.import_xlsx(binary, process_id)
+
+    def import_csv(self, stream: Iterable[str], process_id: str = DEFAULT_PROCESS_ID) -> ImportReport:
+        """
+        Импортирует реестр из текстового CSV-потока (итератора строк).
+
+        Разделитель (',' или ';') определяется по строке заголовка.
+        """
+        lines = iter(stream)
+        try:
+            header_line = next(lines, "")
+        except UnicodeDecodeError as error:
+            raise _decode_error(1, error) from error
+        if not header_line:
+            raise ImportFormatError("Файл реестра пуст.")
+
+        delimiter = ";" if header_line.count(";") > header_line.count(",") else ","
+        reader = csv.reader(itertools.chain([header_line], lines), delimiter=delimiter)
+        return self._import_rows(reader, process_id)
+
+    def import_xlsx(self, source: Union[BinaryIO, Path], process_id: str = DEFAULT_PROCESS_ID) -> ImportReport:
+        """
+        Импортирует реестр из первого листа XLSX-книги в режиме только чтения.
+        """
+        if load_workbook is None:
+            raise ImportFormatError("Для импорта XLSX установите пакет openpyxl.")
+
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            return self._import_rows(workbook.active.iter_rows(values_only=True), process_id)
+        finally:
+            workbook.close()
+
+    def _import_rows(self, rows: Iterable[Sequence[Any]], process_id: str) -> ImportReport:
+        """
+        Валидирует строки и пачками записывает шаги в репозиторий.
+        """
+        iterator: Iterator[Sequence[Any]] = iter(rows)
+        header = next(iterator, None)
+        if header is None:
+            raise ImportFormatError("Файл реестра пуст.")
+
+        parser = StepRowParser(header)
+        report = ImportReport()
+        batch: List[Dict[str, str]] = []
+
+        with self._repository.open_import(process_id) as writer:
+            # Строка 1 — заголовок, данные начинаются со строки 2
+            row_number = 1
+            while True:
+                row_number += 1
+                try:
+                    row = next(iterator)
+                except StopIteration:
+                    break
+                except UnicodeDecodeError as error:
+                    # Импорт откатывается: дальнейшие строки прочитать нельзя
+                    raise _decode_error(row_number, error) from error
+
+                if StepRowParser.is_blank(row):
+                    report.skipped += 1
+                    continue
+                try:
+                    batch.append(parser.parse(row))
+                except ValueError as error:
+                    report.add_error(row_number, str(error), self._max_errors)
+                    continue
+
+                if report.error_count and not self._allow_partial:
+                    # Импорт уже не будет зафиксирован — строки только проверяются
+                    batch = []
+                    continue
+
+                if len(batch) >= self._batch_size:
+                    writer.write_batch(batch)
+                    batch = []
+
+            if report.error_count and not self._allow_partial:
+                # Условия ветвятся на следующие по порядку шаги, поэтому пропуск
+                # строки перестроил бы связи: сохранённый процесс не меняется
+                writer.discard()
+                return report
+
+            if batch:
+                writer.write_batch(batch)
+
+            report.imported = writer.steps_written
+            report.departments = writer.departments
+
+        report.committed = report.imported > 0
+        report.version = writer.version
+        return report
+
+
+def _decode_error(row_number: int, error: UnicodeDecodeError) -> ImportFormatError:
+    """
+    Формирует ошибку чтения CSV в неверной кодировке с номером строки.
+    """
+    return ImportFormatError(
+        f"Строка {row_number}: не удалось прочитать текст в кодировке {error.encoding} ({error.reason}). "
+        "Укажите кодировку файла, например cp1251."
+    )
+
+
+def decode_lines(binary: BinaryIO, encoding: str) -> Iterator[str]:
+    """
+    Построчно декодирует бинарный поток CSV.
+
+    Каждая строка декодируется отдельно, поэтому ошибка кодировки
+    возникает ровно на той строке, где встретился неверный байт.
+    """
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)()
+    except LookupError as error:
+        raise ImportFormatError(f"Неизвестная кодировка '{encoding}'.") from error
+
+    for raw_line in binary:
+        yield decoder.decode(raw_line)
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def detect_format(filename: str) -> str:
+    """
+    Определяет формат реестра по имени файла.
+    """
+    suffix = Path(filename or "").suffix.lower().lstrip(".")
+    if suffix not in SUPPORTED_FORMATS:
+        raise ImportFormatError(f"Неподдерживаемый формат файла '{suffix}', ожидается CSV или XLSX.")
+    return suffix
+
+
+def import_upload(
+    importer: StepImporter,
+    filename: str,
+    stream: BinaryIO,
+    process_id: str = DEFAULT_PROCESS_ID,
+    encoding: str = AppConfig.IMPORT_ENCODING,
+) -> ImportReport:
+    """
+    Импортирует загруженный по HTTP файл реестра, не читая его целиком в память.
+    """
+    if detect_format(filename) == "csv":
+        return importer.import_csv(decode_lines(stream, encoding), process_id)
+    return importer.import_xlsx(stream, process_id)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа CLI: импортирует реестр шагов в сохранённый процесс.
+    """
+    parser = argparse.ArgumentParser(description="Импорт шагов процесса из реестра CSV/XLSX.")
+    parser.add_argument("path", type=Path, help="Путь к файлу реестра (.csv или .xlsx)")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=AppConfig.IMPORT_BATCH_SIZE,
+        help="Количество шагов в одной пачке записи",
+    )
+    parser.add_argument(
+        "--process-id",
+        default=DEFAULT_PROCESS_ID,
+        help="Идентификатор процесса, в который выполняется импорт",
+    )
+    parser.add_argument(
+        "--allow-partial",
+        action="store_true",
+        help="Сохранить корректные строки, даже если в реестре есть ошибки",
+    )
+    parser.add_argument(
+        "--encoding",
+        default=AppConfig.IMPORT_ENCODING,
+        help="Кодировка CSV-файла (например, cp1251 для выгрузок Excel)",
+    )
+    args = parser.parse_args(argv)
+
+    importer = StepImporter(ProcessRepository(), batch_size=args.batch_size, allow_partial=args.allow_partial)
+    try:
+        report = importer.import_file(args.path, args.process_id, args.encoding)
+    except ValueError as error:
+        # ImportFormatError или недопустимый идентификатор процесса
+        parser.error(str(error))
+
+    print(json.dumps(report.to_dict(), ensure_ascii=False, indent=2))
+    return 0 if report.committed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,399 @@
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import logging
+import random
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from werkzeug.serving import make_server
+
+from config import AppConfig
+from domain import STEP_TYPES
+from web_app import create_app
+
+
+@dataclass
+class EndpointStats:
+    """
+    Результаты запросов к одному эндпоинту.
+    """
+
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+    conflicts: int = 0
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Возвращает перцентиль задержки в секундах (метод ближайшего ранга).
+        """
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+        return ordered[index]
+
+
+class LoadStats:
+    """
+    Потокобезопасный сбор задержек и ошибок по эндпоинтам.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.endpoints: Dict[str, EndpointStats] = {}
+
+    def record(self, endpoint: str, latency: float, status: int) -> None:
+        """
+        Учитывает один выполненный запрос.
+
+        409 считается ожидаемым конфликтом версий, а не ошибкой.
+        """
+        with self._lock:
+            stats = self.endpoints.setdefault(endpoint, EndpointStats())
+            stats.latencies.append(latency)
+            if status == 409:
+                stats.conflicts += 1
+            elif status >= 400 or status == 0:
+                stats.errors += 1
+
+
+class SimulatedEditor(threading.Thread):
+    """
+    Редактор, повторяющий поведение клиента web_index.html.
+
+    Загружает процесс, затем в цикле переставляет шаги (drag & drop)
+    и вызывает generateGraph, периодически сохраняя процесс.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        process_id: str,
+        steps_count: int,
+        save_every: int,
+        think_time: float,
+        stop_at: float,
+        stats: LoadStats,
+        seed: int,
+    ) -> None:
+        super().__init__(daemon=True)
+        parts = urlsplit(base_url)
+        self._host = parts.hostname or "127.0.0.1"
+        self._port = parts.port or 80
+        self._process_id = process_id
+        self._steps_count = steps_count
+        self._save_every = max(1, save_every)
+        self._think_time = think_time
+        self._stop_at = stop_at
+        self._stats = stats
+        self._random = random.Random(seed)
+        self._connection: Optional[http.client.HTTPConnection] = None
+        self._departments: List[str] = []
+        self._steps: List[Dict[str, str]] = []
+        self._version = 0
+
+    def run(self) -> None:
+        """
+        Выполняет сценарий редактора до истечения времени теста.
+        """
+        self._connection = http.client.HTTPConnection(self._host, self._port, timeout=60)
+        try:
+            self._load()
+            if not self._steps:
+                self._steps = self._make_steps()
+
+            iteration = 0
+            while time.perf_counter() < self._stop_at:
+                self._reorder()
+                self._request("POST", "/api/process/from-steps", {"steps": self._steps})
+                iteration += 1
+                if iteration % self._save_every == 0:
+                    self._save()
+                if self._think_time:
+                    time.sleep(self._random.uniform(0, 2 * self._think_time))
+        finally:
+            self._connection.close()
+
+    def _load(self) -> None:
+        """
+        Загружает процесс, как loadProcess при открытии страницы.
+        """
+        status, data = self._request("GET", f"/api/process/load?process_id={self._process_id}")
+        if status == 200 and data:
+            self._departments = data.get("departments") or []
+            self._steps = data.get("steps") or []
+            self._version = data.get("version") or 0
+
+    def _save(self) -> None:
+        """
+        Сохраняет процесс; при конфликте версий загружает его заново.
+        """
+        payload = {
+            "process_id": self._process_id,
+            "version": self._version,
+            "departments": self._departments,
+            "steps": self._steps,
+        }
+        status, data = self._request("POST", "/api/process/save", payload)
+        if status == 200 and data:
+            self._version = data["version"]
+        elif status == 409:
+            self._load()
+
+    def _reorder(self) -> None:
+        """
+        Перемещает случайный шаг на новое место, как перетаскивание строки.
+        """
+        if len(self._steps) < 2:
+            return
+        step = self._steps.pop(self._random.randrange(len(self._steps)))
+        self._steps.insert(self._random.randrange(len(self._steps) + 1), step)
+
+    def _make_steps(self) -> List[Dict[str, str]]:
+        """
+        Формирует процесс заданного размера с отделами и условиями.
+        """
+        self._departments = [f"Отдел_{index + 1}" for index in range(5)]
+        return [
+            {
+                "title": f"Шаг {index + 1}",
+                "department": self._departments[index % len(self._departments)],
+                "type": STEP_TYPES[0] if index % 4 else self._random.choice(STEP_TYPES),
+            }
+            for index in range(self._steps_count)
+        ]
+
+    def _request(self, method: str, path: str, payload: Any = None) -> Tuple[int, Any]:
+        """
+        Выполняет запрос по keep-alive соединению и записывает задержку.
+        """
+        endpoint = path.split("?", 1)[0]
+        body = None if payload is None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+
+        started = time.perf_counter()
+        status = 0
+        data: Any = None
+        try:
+            self._connection.request(method, path, body=body, headers=headers)
+            response = self._connection.getresponse()
+            raw = response.read()
+            status = response.status
+            if raw and response.getheader("Content-Type", "").startswith("application/json"):
+                data = json.loads(raw)
+        except (OSError, http.client.HTTPException):
+            # Соединение могло быть закрыто сервером — переподключаемся
+            self._connection.close()
+        finally:
+            self._stats.record(endpoint, time.perf_counter() - started, status)
+        return status, data
+
+
+@dataclass
+class RunResult:
+    """
+    Итог одного прогона нагрузки.
+    """
+
+    editors: int
+    steps: int
+    duration: float
+    stats: LoadStats
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """
+        Возвращает сводку по эндпоинтам и итоговую строку.
+        """
+        rows = []
+        total = EndpointStats()
+        for endpoint, stats in sorted(self.stats.endpoints.items()):
+            rows.append(self._row(endpoint, stats))
+            total.latencies.extend(stats.latencies)
+            total.errors += stats.errors
+            total.conflicts += stats.conflicts
+        rows.append(self._row("total", total))
+        return rows
+
+    def _row(self, endpoint: str, stats: EndpointStats) -> Dict[str, Any]:
+        count = len(stats.latencies)
+        return {
+            "editors": self.editors,
+            "steps": self.steps,
+            "endpoint": endpoint,
+            "requests": count,
+            "rps": count / self.duration if self.duration else 0.0,
+            "p50_ms": stats.percentile(0.50) * 1000,
+            "p90_ms": stats.percentile(0.90) * 1000,
+            "p99_ms": stats.percentile(0.99) * 1000,
+            "max_ms": (max(stats.latencies) if stats.latencies else 0.0) * 1000,
+            "error_rate": stats.errors / count if count else 0.0,
+            "conflicts": stats.conflicts,
+        }
+
+
+class LocalServer:
+    """
+    Экземпляр create_app() на локальном многопоточном сервере werkzeug.
+
+    Данные процессов хранятся во временном каталоге, чтобы нагрузка
+    не затрагивала рабочий process.json. Пути в AppConfig подменяются
+    на время работы сервера и восстанавливаются при выходе.
+    """
+
+    def __init__(self, port: int = 0) -> None:
+        self._data_dir = tempfile.TemporaryDirectory(prefix="bpmn_load_")
+        data_path = Path(self._data_dir.name)
+        self._original_paths = (AppConfig.PROCESS_FILE, AppConfig.PROCESSES_DIR)
+        AppConfig.PROCESS_FILE = data_path / "process.json"
+        AppConfig.PROCESSES_DIR = data_path / "processes"
+
+        # Журнал каждого запроса сам по себе искажает задержки
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+        try:
+            # ProcessRepository читает пути из AppConfig при вызове create_app()
+            self._server = make_server("127.0.0.1", port, create_app(), threaded=True)
+        except BaseException:
+            self._restore()
+            raise
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def __enter__(self) -> "LocalServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._server.shutdown()
+        self._thread.join()
+        self._restore()
+
+    def _restore(self) -> None:
+        """
+        Возвращает исходные пути хранилища и удаляет временные данные.
+        """
+        AppConfig.PROCESS_FILE, AppConfig.PROCESSES_DIR = self._original_paths
+        self._data_dir.cleanup()
+
+
+def run_load(
+    base_url: str,
+    editors: int,
+    steps: int,
+    duration: float,
+    processes: int,
+    save_every: int,
+    think_time: float,
+    seed: int,
+) -> RunResult:
+    """
+    Запускает editors редакторов на duration секунд и собирает статистику.
+
+    Редакторы распределяются по processes процессам; при processes < editors
+    несколько редакторов правят один процесс и получают конфликты версий.
+    """
+    stats = LoadStats()
+    # Уникальная метка: повторные прогоны не подхватывают процессы прошлых запусков
+    run_tag = f"load_{uuid.uuid4().hex[:8]}_{steps}_{editors}"
+    started = time.perf_counter()
+    stop_at = started + duration
+    workers = [
+        SimulatedEditor(
+            base_url=base_url,
+            process_id=f"{run_tag}_{index % max(1, processes)}",
+            steps_count=steps,
+            save_every=save_every,
+            think_time=think_time,
+            stop_at=stop_at,
+            stats=stats,
+            seed=seed * 10007 + index,
+        )
+        for index in range(editors)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return RunResult(editors=editors, steps=steps, duration=time.perf_counter() - started, stats=stats)
+
+
+def print_table(rows: List[Dict[str, Any]]) -> None:
+    """
+    Печатает сводку прогонов в виде таблицы.
+    """
+    header = (
+        f"{'editors':>7} {'steps':>6} {'endpoint':<26} {'requests':>8} {'rps':>8} "
+        f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7} {'409':>5}"
+    )
+    print(header)
+    for row in rows:
+        print(
+            f"{row['editors']:>7} {row['steps']:>6} {row['endpoint']:<26} {row['requests']:>8} "
+            f"{row['rps']:>8.1f} {row['p50_ms']:>8.1f} {row['p90_ms']:>8.1f} {row['p99_ms']:>8.1f} "
+            f"{row['max_ms']:>8.1f} {row['error_rate']:>6.1%} {row['conflicts']:>5}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Точка входа: прогоняет матрицу «число редакторов × размер процесса».
+    """
+    parser = argparse.ArgumentParser(description="Нагрузочный тест API конструктора процессов.")
+    parser.add_argument(
+        "--url",
+        help=(
+            "Адрес уже запущенного сервера с одноразовым каталогом данных: тест создаёт в нём "
+            "процессы load_* и не удаляет их; по умолчанию поднимается локальный create_app()"
+        ),
+    )
+    parser.add_argument("--editors", type=int, nargs="+", default=[1, 4, 16], help="Число одновременных редакторов")
+    parser.add_argument("--steps", type=int, nargs="+", default=[20, 200], help="Размер процесса в шагах")
+    parser.add_argument("--duration", type=float, default=10.0, help="Длительность одного прогона, с")
+    parser.add_argument("--processes", type=int, default=0, help="Число различных процессов (0 — по одному на редактора)")
+    parser.add_argument("--save-every", type=int, default=5, help="Сохранять процесс каждые N перестроений графа")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Средняя пауза редактора между действиями, с")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", type=Path, help="Сохранить результаты в JSON-файл")
+    args = parser.parse_args(argv)
+
+    def run_matrix(base_url: str) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        for steps in args.steps:
+            for editors in args.editors:
+                result = run_load(
+                    base_url=base_url,
+                    editors=editors,
+                    steps=steps,
+                    duration=args.duration,
+                    processes=args.processes or editors,
+                    save_every=args.save_every,
+                    think_time=args.think_time,
+                    seed=args.seed,
+                )
+                rows.extend(result.rows())
+        return rows
+
+    if args.url:
+        rows = run_matrix(args.url)
+    else:
+        with LocalServer() as server:
+            rows = run_matrix(server.url)
+
+    print_table(rows)
+    if args.json:
+        args.json.write_text(json.dumps(rows, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - на Windows блокировка только внутри процесса
+    fcntl = None
+
+
+class ProcessLockRegistry:
+    """
+    Блокировки записи, отдельные для каждого бизнес-процесса.
+
+    Внутри сервера запись сериализуется потоковой блокировкой процесса,
+    между серверами (несколько воркеров) — файловой блокировкой flock.
+    Записи разных процессов друг друга не блокируют. Блокировки и
+    lock-файлы существуют только пока их кто-то удерживает или ждёт.
+    """
+
+    def __init__(self, lock_dir: Path) -> None:
+        """
+        Инициализирует реестр с каталогом для lock-файлов.
+        """
+        self._lock_dir = lock_dir
+        self._guard = threading.Lock()
+        # process_id -> [блокировка, число удерживающих и ожидающих потоков]
+        self._locks: Dict[str, List] = {}
+
+    @contextmanager
+    def hold(self, process_id: str) -> Iterator[None]:
+        """
+        Удерживает блокировку записи процесса на время блока with.
+        """
+        lock = self._acquire_thread_lock(process_id)
+        try:
+            if fcntl is None:
+                yield
+            else:
+                with self._file_lock(process_id):
+                    yield
+        finally:
+            lock.release()
+            self._release_entry(process_id)
+
+    def _acquire_thread_lock(self, process_id: str) -> threading.Lock:
+        """
+        Захватывает потоковую блокировку процесса, создавая её при необходимости.
+        """
+        with self._guard:
+            entry = self._locks.get(process_id)
+            if entry is None:
+                entry = self._locks[process_id] = [threading.Lock(), 0]
+            entry[1] += 1
+        entry[0].acquire()
+        return entry[0]
+
+    def _release_entry(self, process_id: str) -> None:
+        """
+        Удаляет блокировку процесса, если её больше никто не использует.
+        """
+        with self._guard:
+            entry = self._locks[process_id]
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[process_id]
+
+    @contextmanager
+    def _file_lock(self, process_id: str) -> Iterator[None]:
+        """
+        Удерживает flock на lock-файле процесса и удаляет файл при выходе.
+
+        Ожидающий мог открыть уже удалённый файл, поэтому после захвата
+        проверяется, что путь указывает на тот же inode; иначе попытка повторяется.
+        """
+        self._lock_dir.mkdir(parents=True, exist_ok=True)
+        lock_path = self._lock_dir / f".{process_id}.lock"
+        while True:
+            lock_file = lock_path.open("a")
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                if os.stat(lock_path).st_ino == os.fstat(lock_file.fileno()).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            lock_file.close()
+
+        try:
+            yield
+        finally:
+            # Удаление до снятия блокировки: новые ожидающие создадут свежий файл
+            lock_path.unlink()
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            lock_file.close()
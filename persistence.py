@@ -1,44 +1,319 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, List
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterable, List, Optional, Tuple
 
 from config import AppConfig
+from locking import ProcessLockRegistry
+
+
+# Идентификатор процесса по умолчанию (файл process.json)
+DEFAULT_PROCESS_ID = "default"
+
+# Допустимый идентификатор процесса: используется в имени файла
+PROCESS_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class VersionConflictError(Exception):
+    """
+    Процесс был изменён другим редактором после загрузки.
+    """
+
+    def __init__(self, process_id: str, expected_version: int, current_version: int) -> None:
+        super().__init__(
+            f"Процесс '{process_id}' изменён: ожидалась версия {expected_version}, текущая {current_version}."
+        )
+        self.process_id = process_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+
+
+class StepImportWriter:
+    """
+    Потоковая запись импортируемых шагов в файл процесса.
+
+    Шаги дописываются пачками во временный файл рядом с файлом процесса.
+    Файл процесса атомарно заменяется только при успешном завершении импорта,
+    поэтому прерванный импорт не портит сохранённый процесс.
+    """
+
+    def __init__(self, repository: "ProcessRepository", process_id: str) -> None:
+        """
+        Открывает временный файл для записи шагов.
+        """
+        self._repository = repository
+        self._process_id = process_id
+        self._path = repository.path_for(process_id)
+        self._departments: List[str] = []
+        self._known_departments: set = set()
+        self._steps_written = 0
+        self._discarded = False
+        self.version = 0
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{self._path.name}.", suffix=".tmp", dir=str(self._path.parent))
+        self._tmp_path = Path(tmp_name)
+        self._file = os.fdopen(fd, "w", encoding="utf-8")
+        self._file.write('{\n  "steps": [')
+
+    @property
+    def steps_written(self) -> int:
+        """
+        Количество записанных шагов.
+        """
+        return self._steps_written
+
+    @property
+    def departments(self) -> List[str]:
+        """
+        Отделы в порядке их первого появления в шагах.
+        """
+        return list(self._departments)
+
+    def write_batch(self, steps: Iterable[Dict[str, Any]]) -> None:
+        """
+        Дописывает пачку шагов и сбрасывает её на диск.
+
+        Отделы, встреченные в шагах, добавляются в процесс автоматически.
+        """
+        chunks: List[str] = []
+        for step in steps:
+            department = step.get("department")
+            if department and department not in self._known_departments:
+                self._known_departments.add(department)
+                self._departments.append(department)
+
+            separator = "," if self._steps_written else ""
+            chunks.append(f"{separator}\n    {json.dumps(step, ensure_ascii=False)}")
+            self._steps_written += 1
+
+        self._file.write("".join(chunks))
+        self._file.flush()
+
+    def commit(self) -> None:
+        """
+        Завершает запись и атомарно заменяет файл процесса новой версией.
+        """
+        self._file.write("\n  ],\n")
+        self._file.write(f'  "departments": {json.dumps(self._departments, ensure_ascii=False)},\n')
+
+        # Версия известна только под блокировкой процесса, поэтому пишется последней
+        with self._repository.locked(self._process_id):
+            self.version = self._repository.current_version(self._process_id) + 1
+            self._file.write(f'  "version": {self.version}\n}}\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            os.replace(self._tmp_path, self._path)
+            self._repository._remember_version(self._process_id, self.version)
+
+    def discard(self) -> None:
+        """
+        Помечает импорт как отменённый: при выходе он будет откачен.
+        """
+        self._discarded = True
+
+    def rollback(self) -> None:
+        """
+        Отменяет импорт и удаляет временный файл.
+        """
+        if not self._file.closed:
+            self._file.close()
+        if self._tmp_path.exists():
+            self._tmp_path.unlink()
+
+    def __enter__(self) -> "StepImportWriter":
+        return self
+
+    def __exit__(self, exc_type: Optional[type], exc: Optional[BaseException], tb: Any) -> None:
+        if exc_type is not None or self._discarded or not self._steps_written:
+            self.rollback()
+            return
+        try:
+            self.commit()
+        except BaseException:
+            self.rollback()
+            raise
 
 
 class ProcessRepository:
     """
-    Хранилище процесса, основанное на JSON-файле.
+    Хранилище процессов, основанное на JSON-файлах.
+
+    Процесс по умолчанию хранится в process.json, остальные —
+    в каталоге processes/ по одному файлу на процесс. Каждое сохранение
+    увеличивает версию процесса; запись выполняется под блокировкой
+    этого процесса и атомарной заменой файла.
     """
 
     def __init__(self) -> None:
         """
-        Инициализирует репозиторий с использованием пути из конфигурации.
+        Инициализирует репозиторий с использованием путей из конфигурации.
         """
         self._path = AppConfig.PROCESS_FILE
+        self._processes_dir = AppConfig.PROCESSES_DIR
+        self._locks = ProcessLockRegistry(self._processes_dir)
+        # process_id -> ((st_ino, st_mtime_ns, st_size), версия); LRU ограниченного размера
+        self._versions: "OrderedDict[str, Tuple[Tuple[int, int, int], int]]" = OrderedDict()
+        self._versions_guard = threading.Lock()
 
-    def save(self, departments: List[str], steps: List[Dict[str, Any]]) -> None:
+    def path_for(self, process_id: str) -> Path:
         """
-        Сохраняет отделы и шаги процесса в файл.
+        Возвращает путь к файлу процесса, проверяя идентификатор.
         """
-        data = {
-            "departments": departments,
-            "steps": steps,
-        }
-        self._path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        if not PROCESS_ID_PATTERN.match(process_id or ""):
+            raise ValueError(f"Недопустимый идентификатор процесса '{process_id}'.")
+        if process_id == DEFAULT_PROCESS_ID:
+            return self._path
+        return self._processes_dir / f"{process_id}.json"
 
-    def load(self) -> Dict[str, Any]:
+    def list_processes(self) -> List[str]:
         """
-        Загружает отделы и шаги процесса из файла, если он существует.
+        Возвращает идентификаторы всех сохранённых процессов.
+        """
+        process_ids = [DEFAULT_PROCESS_ID] if self._path.exists() else []
+        if self._processes_dir.is_dir():
+            process_ids.extend(
+                sorted(
+                    path.stem
+                    for path in self._processes_dir.glob("*.json")
+                    if PROCESS_ID_PATTERN.match(path.stem) and path.stem != DEFAULT_PROCESS_ID
+                )
+            )
+        return process_ids
+
+    def locked(self, process_id: str) -> ContextManager[None]:
+        """
+        Возвращает блокировку записи процесса для использования в with.
+        """
+        return self._locks.hold(process_id)
+
+    def current_version(self, process_id: str = DEFAULT_PROCESS_ID) -> int:
         """
-        if not self._path.exists():
-            return {"departments": [], "steps": []}
+        Возвращает текущую версию процесса (0, если процесс не сохранён).
+
+        Версия берётся из кэша, пока файл процесса не изменился
+        (совпадают inode, mtime и размер); иначе файл читается заново.
+        """
+        path = self.path_for(process_id)
+        try:
+            marker = self._file_marker(path)
+        except FileNotFoundError:
+            return 0
+
+        with self._versions_guard:
+            cached = self._versions.get(process_id)
+            if cached is not None and cached[0] == marker:
+                self._versions.move_to_end(process_id)
+                return cached[1]
+
+        version = self.load(process_id)["version"]
+        self._cache_version(process_id, marker, version)
+        return version
+
+    def save(
+        self,
+        departments: List[str],
+        steps: List[Dict[str, Any]],
+        process_id: str = DEFAULT_PROCESS_ID,
+        expected_version: Optional[int] = None,
+    ) -> int:
+        """
+        Сохраняет отделы и шаги процесса в файл и возвращает новую версию.
+
+        Если передана expected_version, сохранение выполняется только при
+        совпадении её с текущей версией (compare-and-swap), иначе
+        выбрасывается VersionConflictError.
+        """
+        path = self.path_for(process_id)
+        with self.locked(process_id):
+            current_version = self.current_version(process_id)
+            if expected_version is not None and expected_version != current_version:
+                raise VersionConflictError(process_id, expected_version, current_version)
+
+            data = {
+                "departments": departments,
+                "steps": steps,
+                "version": current_version + 1,
+            }
+            self._write_atomic(path, json.dumps(data, ensure_ascii=False, indent=2))
+            self._remember_version(process_id, current_version + 1)
+            return current_version + 1
 
-        raw = self._path.read_text(encoding="utf-8")
+    def open_import(self, process_id: str = DEFAULT_PROCESS_ID) -> StepImportWriter:
+        """
+        Начинает потоковый импорт шагов, заменяющий сохранённый процесс.
+
+        Используется как контекстный менеджер: при выходе без ошибок
+        записанные шаги фиксируются новой версией, иначе импорт откатывается.
+        Импорт без единого шага сохранённый процесс не изменяет.
+        """
+        return StepImportWriter(self, process_id)
+
+    def load(self, process_id: str = DEFAULT_PROCESS_ID) -> Dict[str, Any]:
+        """
+        Загружает отделы, шаги и версию процесса из файла, если он существует.
+        """
+        path = self.path_for(process_id)
+        if not path.exists():
+            return {"departments": [], "steps": [], "version": 0}
+
+        raw = path.read_text(encoding="utf-8")
         data: Dict[str, Any] = json.loads(raw)
         return {
             "departments": data.get("departments") or [],
             "steps": data.get("steps") or [],
+            "version": int(data.get("version") or 0),
         }
 
+    def _remember_version(self, process_id: str, version: int) -> None:
+        """
+        Запоминает версию только что записанного процесса.
+
+        Вызывается под блокировкой процесса сразу после замены файла.
+        """
+        self._cache_version(process_id, self._file_marker(self.path_for(process_id)), version)
 
+    def _cache_version(self, process_id: str, marker: Tuple[int, int, int], version: int) -> None:
+        """
+        Помещает версию в кэш, вытесняя давно не использованные процессы.
+        """
+        with self._versions_guard:
+            self._versions[process_id] = (marker, version)
+            self._versions.move_to_end(process_id)
+            while len(self._versions) > AppConfig.VERSION_CACHE_SIZE:
+                self._versions.popitem(last=False)
+
+    @staticmethod
+    def _file_marker(path: Path) -> Tuple[int, int, int]:
+        """
+        Возвращает признак состояния файла: каждая запись заменяет файл
+        новым (новый inode), поэтому совпадение означает тот же файл.
+        """
+        stat = path.stat()
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _write_atomic(path: Path, text: str) -> None:
+        """
+        Записывает файл через временный файл и атомарную замену,
+        чтобы читатели никогда не видели частично записанные данные.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=str(path.parent))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as tmp_file:
+                tmp_file.write(text)
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+            os.replace(tmp_name, path)
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from typing import Annotated, Dict, List, Optional, Type, TypeVar
+
+import msgspec
+from msgspec import Meta
+
+from config import AppConfig
+from domain import StepType
+from persistence import DEFAULT_PROCESS_ID, PROCESS_ID_PATTERN
+
+
+class PayloadError(ValueError):
+    """
+    Тело запроса не прошло декодирование или проверку схемы.
+    """
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class StepPayload(msgspec.Struct):
+    """
+    Шаг процесса в теле запроса.
+
+    Тип и длину названия проверяет скомпилированный декодер (тип шага —
+    литерал domain.StepType). Крайние пробелы в названии и отделе
+    убираются после декодирования, пустой отдел заменяется на None,
+    поэтому построение графа и сохранение получают одинаковые значения.
+    """
+
+    title: Annotated[str, Meta(max_length=AppConfig.MAX_STEP_TITLE_LENGTH)] = ""
+    department: Optional[str] = None
+    type: StepType = "task"
+
+    def __post_init__(self) -> None:
+        """
+        Нормализует название и отдел шага.
+        """
+        self.title = self.title.strip()
+        if self.department is not None:
+            self.department = self.department.strip() or None
+
+
+Steps = Annotated[List[StepPayload], Meta(max_length=AppConfig.MAX_STEPS)]
+
+ProcessId = Annotated[str, Meta(pattern=PROCESS_ID_PATTERN.pattern)]
+
+
+class FromTextRequest(msgspec.Struct):
+    """
+    Запрос построения линейного процесса из текста.
+    """
+
+    text: str = ""
+
+    @property
+    def lines(self) -> List[str]:
+        """
+        Строки текста, по одной на шаг.
+        """
+        return self.text.splitlines()
+
+
+class FromStepsRequest(msgspec.Struct):
+    """
+    Запрос построения процесса из структурированного списка шагов.
+    """
+
+    steps: Steps = []
+
+
+class SaveRequest(msgspec.Struct):
+    """
+    Запрос сохранения процесса.
+
+    version — версия, с которой редактор начал изменения; при её
+    отсутствии процесс сохраняется без проверки конфликта.
+    """
+
+    process_id: ProcessId = DEFAULT_PROCESS_ID
+    version: Optional[Annotated[int, Meta(ge=0)]] = None
+    departments: List[str] = []
+    steps: Steps = []
+
+
+RequestT = TypeVar("RequestT", bound=msgspec.Struct)
+
+# Скомпилированные декодеры, по одному на схему запроса
+_decoders: Dict[type, msgspec.json.Decoder] = {}
+
+
+def decode_request(data: bytes, schema: Type[RequestT]) -> RequestT:
+    """
+    Декодирует и проверяет тело запроса за один проход.
+
+    Пустое тело трактуется как пустой объект, как и прежний
+    request.get_json(force=True) or {}.
+    """
+    if len(data) > AppConfig.MAX_PAYLOAD_BYTES:
+        raise PayloadError(f"Тело запроса превышает {AppConfig.MAX_PAYLOAD_BYTES} байт.", status=413)
+
+    decoder = _decoders.get(schema)
+    if decoder is None:
+        decoder = _decoders[schema] = msgspec.json.Decoder(schema)
+
+    try:
+        return decoder.decode(data.strip() or b"{}")
+    except msgspec.DecodeError as error:
+        # ValidationError — подкласс DecodeError, сообщение содержит путь к полю
+        raise PayloadError(f"Некорректное тело запроса: {error}") from error
+
+
+def steps_to_dicts(steps: List[StepPayload]) -> List[Dict[str, str]]:
+    """
+    Преобразует шаги в словари для сохранения в хранилище.
+    """
+    return msgspec.to_builtins(steps)
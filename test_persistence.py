@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import multiprocessing
+import shutil
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from typing import List, Tuple
+
+from config import AppConfig
+from persistence import ProcessRepository, VersionConflictError
+
+
+# Предел повторов при конфликте: неверная версия из кэша даёт ошибку, а не зависание
+MAX_RETRIES = 1000
+
+
+def save_with_retries(repository: ProcessRepository, process_id: str, attempts: int) -> int:
+    """
+    Сохраняет процесс attempts раз через compare-and-swap с повтором
+    при конфликте и возвращает число успешных сохранений.
+    """
+    saved = 0
+    for attempt in range(attempts):
+        for _ in range(MAX_RETRIES):
+            version = repository.current_version(process_id)
+            try:
+                repository.save([], [{"title": f"Шаг {attempt}"}], process_id, expected_version=version)
+            except VersionConflictError:
+                continue
+            saved += 1
+            break
+        else:
+            raise AssertionError(f"Процесс '{process_id}' не сохранён за {MAX_RETRIES} попыток.")
+    return saved
+
+
+def run_editor_process(paths: Tuple[str, str], process_id: str, attempts: int, results: "multiprocessing.Queue") -> None:
+    """
+    Редактор в отдельном процессе ОС со своим репозиторием.
+
+    Ошибка передаётся в очередь текстом, чтобы тест не ждал результата.
+    """
+    AppConfig.PROCESS_FILE = Path(paths[0])
+    AppConfig.PROCESSES_DIR = Path(paths[1])
+    try:
+        results.put(save_with_retries(ProcessRepository(), process_id, attempts))
+    except BaseException as error:
+        results.put(repr(error))
+
+
+class ProcessRepositoryConcurrencyTest(unittest.TestCase):
+    """
+    Конкурентные сохранения: compare-and-swap, кэш версий и lock-файлы.
+    """
+
+    ATTEMPTS = 20
+
+    def setUp(self) -> None:
+        self._saved_paths = (AppConfig.PROCESS_FILE, AppConfig.PROCESSES_DIR)
+        self._tmp_dir = Path(tempfile.mkdtemp(prefix="graf_builder_test_"))
+        AppConfig.PROCESS_FILE = self._tmp_dir / "process.json"
+        AppConfig.PROCESSES_DIR = self._tmp_dir / "processes"
+
+    def tearDown(self) -> None:
+        AppConfig.PROCESS_FILE, AppConfig.PROCESSES_DIR = self._saved_paths
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+    def assert_no_lock_leftovers(self, repository: ProcessRepository) -> None:
+        """
+        После завершения записей не остаётся блокировок и lock-файлов.
+        """
+        self.assertEqual(repository._locks._locks, {})
+        self.assertEqual(list(AppConfig.PROCESSES_DIR.glob(".*.lock")), [])
+        self.assertEqual(list(self._tmp_dir.rglob("*.tmp")), [])
+
+    def test_threads_on_several_processes(self) -> None:
+        repository = ProcessRepository()
+        process_ids = ["alpha", "beta", "default"]
+        saved: List[object] = []
+
+        def editor(process_id: str) -> None:
+            try:
+                saved.append(save_with_retries(repository, process_id, self.ATTEMPTS))
+            except BaseException as error:
+                saved.append(repr(error))
+
+        threads = [threading.Thread(target=editor, args=(process_ids[index % 3],)) for index in range(12)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(saved, [self.ATTEMPTS] * 12)
+        for process_id in process_ids:
+            self.assertEqual(repository.current_version(process_id), 4 * self.ATTEMPTS)
+            # Версия в кэше совпадает с версией в файле
+            self.assertEqual(repository.load(process_id)["version"], 4 * self.ATTEMPTS)
+        self.assert_no_lock_leftovers(repository)
+
+    def test_os_processes_on_one_process(self) -> None:
+        paths = (str(AppConfig.PROCESS_FILE), str(AppConfig.PROCESSES_DIR))
+        results: "multiprocessing.Queue" = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=run_editor_process, args=(paths, "shared", self.ATTEMPTS, results))
+            for _ in range(6)
+        ]
+        for worker in workers:
+            worker.start()
+        saved = [results.get(timeout=60) for _ in workers]
+        for worker in workers:
+            worker.join()
+            self.assertEqual(worker.exitcode, 0)
+
+        repository = ProcessRepository()
+        self.assertEqual(saved, [self.ATTEMPTS] * 6)
+        self.assertEqual(repository.current_version("shared"), 6 * self.ATTEMPTS)
+        self.assert_no_lock_leftovers(repository)
+
+    def test_stale_version_is_rejected(self) -> None:
+        repository = ProcessRepository()
+        self.assertEqual(repository.save([], [], "gamma", expected_version=0), 1)
+        self.assertEqual(repository.save([], [], "gamma", expected_version=1), 2)
+
+        with self.assertRaises(VersionConflictError) as context:
+            repository.save([], [], "gamma", expected_version=1)
+        self.assertEqual(context.exception.current_version, 2)
+        self.assertEqual(repository.load("gamma")["version"], 2)
+        self.assert_no_lock_leftovers(repository)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,37 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Type
 
 from flask import Flask, jsonify, request, send_from_directory
 
+from config import AppConfig
 from domain import ProcessGraph
-from persistence import ProcessRepository
+from importer import StepImporter, import_upload
+from persistence import DEFAULT_PROCESS_ID, ProcessRepository, VersionConflictError
+from schemas import (
+    FromStepsRequest,
+    FromTextRequest,
+    PayloadError,
+    RequestT,
+    SaveRequest,
+    decode_request,
+    steps_to_dicts,
+)
+
+
+def read_payload(schema: Type[RequestT]) -> RequestT:
+    """
+    Читает тело текущего запроса и декодирует его по схеме.
+
+    Слишком большие тела отклоняются по Content-Length ещё до чтения,
+    а при его отсутствии — не более чем после MAX_PAYLOAD_BYTES + 1 байт.
+    """
+    limit = AppConfig.MAX_PAYLOAD_BYTES
+    if request.content_length is not None and request.content_length > limit:
+        raise PayloadError(f"Тело запроса превышает {limit} байт.", status=413)
+
+    data = request.stream.read(limit + 1)
+    return decode_request(data, schema)
 
 
 def create_app() -> Flask:
@@ -15,6 +41,20 @@ def create_app() -> Flask:
     app = Flask(__name__, static_folder=".", static_url_path="")
     repository = ProcessRepository()
 
+    @app.errorhandler(PayloadError)
+    def payload_error(error: PayloadError) -> Any:
+        """
+        Возвращает описание ошибки декодирования тела запроса.
+        """
+        return jsonify({"error": str(error)}), error.status
+
+    @app.errorhandler(VersionConflictError)
+    def version_conflict(error: VersionConflictError) -> Any:
+        """
+        Сообщает о конфликте версий и возвращает текущую версию процесса.
+        """
+        return jsonify({"error": str(error), "version": error.current_version}), 409
+
     @app.route("/")
     def index() -> Any:
         """
@@ -32,11 +72,9 @@ def create_app() -> Flask:
             "text": "Шаг 1\nШаг 2\nШаг 3"
         }
         """
-        payload: Dict[str, Any] = request.get_json(force=True) or {}
-        raw_text: str = payload.get("text", "")
-        lines = raw_text.splitlines()
+        payload = read_payload(FromTextRequest)
 
-        graph = ProcessGraph.from_text_lines(lines)
+        graph = ProcessGraph.from_text_lines(payload.lines)
         return jsonify(graph.to_dict())
 
     @app.post("/api/process/from-steps")
@@ -52,10 +90,9 @@ def create_app() -> Flask:
             ]
         }
         """
-        payload: Dict[str, Any] = request.get_json(force=True) or {}
-        steps: List[Dict[str, str]] = payload.get("steps") or []
+        payload = read_payload(FromStepsRequest)
 
-        graph = ProcessGraph.from_structured_steps(steps)
+        graph = ProcessGraph.from_structured_steps(payload.steps)
         return jsonify(graph.to_dict())
 
     @app.post("/api/process/save")
@@ -65,26 +102,82 @@ def create_app() -> Flask:
 
         Ожидает JSON вида:
         {
+            "process_id": "default",
+            "version": 3,
             "departments": ["Отдел_1", "Отдел_2"],
             "steps": [
                 {"title": "Шаг 1", "department": "Отдел_1"},
                 {"title": "Шаг 2", "department": "Отдел_2"}
             ]
         }
+
+        Возвращает новую версию процесса. Если процесс уже изменён
+        после версии "version", отвечает 409 с текущей версией.
+        """
+        payload = read_payload(SaveRequest)
+
+        version = repository.save(
+            departments=payload.departments,
+            steps=steps_to_dicts(payload.steps),
+            process_id=payload.process_id,
+            expected_version=payload.version,
+        )
+        return jsonify({"status": "ok", "version": version})
+
+    @app.post("/api/process/import")
+    def import_process() -> Any:
         """
-        payload: Dict[str, Any] = request.get_json(force=True) or {}
-        departments: List[str] = payload.get("departments") or []
-        steps: List[Dict[str, str]] = payload.get("steps") or []
+        Импортирует шаги процесса из реестра CSV/XLSX, заменяя сохранённый процесс.
 
-        repository.save(departments=departments, steps=steps)
-        return jsonify({"status": "ok"})
+        Ожидает multipart/form-data с файлом в поле "file", необязательным
+        идентификатором процесса в поле "process_id" и кодировкой CSV
+        в поле "encoding" (по умолчанию utf-8-sig — UTF-8 с BOM или без,
+        для Excel — cp1251).
+
+        Если хотя бы одна строка содержит ошибку, процесс не сохраняется
+        и возвращается 422, кроме случая allow_partial=1 в форме, когда
+        сохраняются только корректные строки. Возвращает отчёт вида:
+        {
+            "imported": 1200,
+            "committed": true,
+            "skipped": 3,
+            "version": 4,
+            "departments": ["Отдел_1", "Отдел_2"],
+            "error_count": 1,
+            "errors": [{"row": 17, "message": "не заполнено название шага"}]
+        }
+        """
+        upload = request.files.get("file")
+        if upload is None or not upload.filename:
+            return jsonify({"error": "Не передан файл реестра в поле 'file'."}), 400
+
+        process_id = request.form.get("process_id") or DEFAULT_PROCESS_ID
+        encoding = request.form.get("encoding") or AppConfig.IMPORT_ENCODING
+        allow_partial = (request.form.get("allow_partial") or "").lower() in ("1", "true", "yes")
+        importer = StepImporter(repository, allow_partial=allow_partial)
+        try:
+            report = import_upload(importer, upload.filename, upload.stream, process_id, encoding)
+        except ValueError as error:
+            # ImportFormatError или недопустимый идентификатор процесса
+            return jsonify({"error": str(error)}), 400
+
+        if report.error_count and not report.committed:
+            return jsonify(report.to_dict()), 422
+        return jsonify(report.to_dict())
 
     @app.get("/api/process/load")
     def load_process() -> Any:
         """
         Загружает сохраненный процесс из JSON-файла, если он существует.
+
+        Идентификатор процесса передаётся параметром ?process_id=,
+        в ответе возвращается версия для последующего сохранения.
         """
-        data = repository.load()
+        process_id = request.args.get("process_id") or DEFAULT_PROCESS_ID
+        try:
+            data = repository.load(process_id)
+        except ValueError as error:
+            return jsonify({"error": str(error)}), 400
         return jsonify(data)
 
     return app